@@ -0,0 +1,3 @@
+# Copyright (c) Microsoft. All rights reserved.
+
+"""Azure Trust Agents DevUI entities and launcher."""
@@ -5,33 +5,46 @@ Azure Trust Agents - DevUI Launcher
 This script provides a comprehensive interface for launching the Microsoft Agent Framework DevUI
 with all the agents and workflows from the Azure Trust Agents Challenge 1.
 
-Usage:
-    python devui_launcher.py --mode directory      # Launch with directory discovery
-    python devui_launcher.py --mode agents         # Launch with individual agents only
-    python devui_launcher.py --mode workflow       # Launch with workflow only
-    python devui_launcher.py --mode all            # Launch with all entities in-memory (default)
+Usage (from the challenge-1 directory):
+    python -m devui.devui_launcher --mode directory      # Launch with directory discovery
+    python -m devui.devui_launcher --mode agents         # Launch with individual agents only
+    python -m devui.devui_launcher --mode workflow       # Launch with workflow only
+    python -m devui.devui_launcher --mode all            # Launch with all entities in-memory (default)
 """
 
 import argparse
+import atexit
+import orjson
 import redis
+import redis.asyncio as aredis
 import hashlib
 import asyncio
+import functools
+import importlib
+import inspect
 import logging
 import os
+import re
 import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, List
 
-# Add the parent directory to the path to import agents and workflow
 current_dir = Path(__file__).parent
-parent_dir = current_dir.parent
-sys.path.insert(0, str(parent_dir))
 
+from azure.core.exceptions import HttpResponseError, ServiceRequestError, ServiceResponseError
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv(override=True)
 
+logger = logging.getLogger(__name__)
+
 def setup_logging():
     """Setup logging configuration"""
     logging.basicConfig(
@@ -39,15 +52,24 @@ def setup_logging():
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
 
-def check_environment():
+ALL_REQUIRED_VARS = [
+    "AI_FOUNDRY_PROJECT_ENDPOINT",
+    "MODEL_DEPLOYMENT_NAME",
+    "COSMOS_ENDPOINT",
+    "COSMOS_KEY"
+]
+
+# Directory discovery imports nothing up front; every other mode loads modules
+# that build Azure AI and Cosmos DB clients at import time
+REQUIRED_BY_MODE = {
+    "directory": [],
+    "agents": ALL_REQUIRED_VARS,
+    "workflow": ALL_REQUIRED_VARS,
+    "all": ALL_REQUIRED_VARS,
+}
+
+def check_environment(required_vars):
     """Check if required environment variables are set"""
-    required_vars = [
-        "AI_FOUNDRY_PROJECT_ENDPOINT",
-        "MODEL_DEPLOYMENT_NAME",
-        "COSMOS_ENDPOINT",
-        "COSMOS_KEY"
-    ]
-    
     missing_vars = []
     for var in required_vars:
         if not os.environ.get(var):
@@ -64,6 +86,27 @@ def check_environment():
     print("✅ All required environment variables are set")
     return True
 
+# DevUI entities by name, imported only when a launch mode asks for them
+ENTITY_MODULES = {
+    "customer_data_agent": (".customer_data_agent", "agent"),
+    "risk_analyser_agent": (".risk_analyser_agent", "agent"),
+    "compliance_report_agent": (".compliance_report_agent", "agent"),
+    "fraud_detection_workflow": (".fraud_detection_workflow", "workflow"),
+}
+
+AGENT_ENTITIES = ["customer_data_agent", "risk_analyser_agent", "compliance_report_agent"]
+
+@functools.lru_cache(maxsize=None)
+def load_entity(name):
+    """Import a DevUI entity on first use and reuse it afterwards"""
+    module_name, attribute = ENTITY_MODULES[name]
+    return getattr(importlib.import_module(module_name, package=__package__), attribute)
+
+def load_entities(names):
+    """Import several DevUI entities concurrently, preserving their order"""
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        return list(pool.map(load_entity, names))
+
 def launch_directory_mode(port: int = 8080):
     """Launch DevUI with directory-based discovery"""
     from agent_framework.devui import serve
@@ -81,11 +124,7 @@ def launch_agents_mode(port: int = 8081):
     
     # Import agents
     try:
-        from devui.customer_data_agent import agent as customer_agent
-        from devui.risk_analyser_agent import agent as risk_agent
-        from devui.compliance_report_agent import agent as compliance_agent
-
-        agents = [customer_agent, risk_agent, compliance_agent]
+        agents = load_entities(AGENT_ENTITIES)
 
         print(f"🚀 Launching DevUI with {len(agents)} agents on port {port}")
         print("🤖 Available agents:")
@@ -105,7 +144,7 @@ def launch_workflow_mode(port: int = 8082):
     
     # Import workflow
     try:
-        from devui.fraud_detection_workflow import workflow
+        workflow = load_entity("fraud_detection_workflow")
 
         print(f"🚀 Launching DevUI with fraud detection workflow on port {port}")
         print(f"🔄 Workflow: {workflow.name}")
@@ -117,14 +156,234 @@ def launch_workflow_mode(port: int = 8082):
         print(f"❌ Error importing workflow: {e}")
         sys.exit(1)
 
+REDIS_OPTIONS = dict(host='redis', port=6379, db=0, socket_connect_timeout=0.25, socket_timeout=0.5)
+
+@functools.lru_cache(maxsize=1)
 def get_cache():
+    """Return a pooled asyncio Redis client, or None if Redis is unreachable"""
+    # Probe synchronously at startup; the event loop is not running yet
+    probe = redis.Redis(**REDIS_OPTIONS)
     try:
-        return redis.Redis(host='redis', port=6379, db=0)
-    except Exception:
+        probe.ping()
+    except redis.RedisError:
         return None
+    finally:
+        probe.close()
+    pool = aredis.ConnectionPool(max_connections=32, **REDIS_OPTIONS)
+    return aredis.Redis(connection_pool=pool)
+
+# SHA-256 is only needed when keys must be collision-resistant against adversarial input
+CACHE_KEY_SHA256 = os.environ.get("CACHE_KEY_SHA256", "").lower() in ("1", "true", "yes")
+
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so trivially different prompts share a cache entry"""
+    return _WHITESPACE.sub(' ', prompt.strip())
 
 def cache_key(prompt):
-    return hashlib.sha256(prompt.encode()).hexdigest()
+    data = normalize_prompt(prompt).encode('utf-8')
+    if CACHE_KEY_SHA256:
+        return hashlib.sha256(data).hexdigest()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+# Bump CACHE_KEY_VERSION to invalidate all cached responses without FLUSHDB
+CACHE_KEY_VERSION = "v3"
+CACHE_TTL_SEC = int(os.environ.get("CACHE_TTL_SEC", "3600"))
+# Swapping the model deployment must not serve responses from the previous model
+CACHE_MODEL = os.environ.get("MODEL_DEPLOYMENT_NAME", "default")
+
+def agent_cache_key(agent_name, prompt):
+    return f"agent:{agent_name}:{CACHE_MODEL}:{CACHE_KEY_VERSION}:{cache_key(prompt)}"
+
+# Cached values carry a one-byte marker so compressed and raw entries can coexist
+COMPRESSED_PREFIX = b"z"
+RAW_PREFIX = b"r"
+COMPRESS_MIN_BYTES = 512
+
+def result_payload(result):
+    """Collect the parts of an agent response worth serving on a cache hit"""
+    usage = getattr(result, 'usage_details', None) or getattr(result, 'usage', None)
+    if usage is not None and hasattr(usage, 'to_dict'):
+        usage = usage.to_dict()
+    return {'text': result.text, 'usage': usage}
+
+def encode_cached_payload(payload):
+    data = orjson.dumps(payload, default=str)
+    if len(data) < COMPRESS_MIN_BYTES:
+        return RAW_PREFIX + data
+    return COMPRESSED_PREFIX + zlib.compress(data, 3)
+
+def decode_cached_payload(value):
+    # Values are binary, so the client keeps raw bytes; a memoryview skips copying them
+    body = memoryview(value)[1:]
+    data = zlib.decompress(body) if value[:1] == COMPRESSED_PREFIX else body
+    return orjson.loads(data)
+
+# Transient upstream failures are remembered briefly so identical prompts fail fast
+NEGATIVE_CACHE_TTL_SEC = 30
+ERROR_KEY_SUFFIX = ":err"
+
+class CachedFailureError(RuntimeError):
+    """Raised when an identical prompt failed upstream within NEGATIVE_CACHE_TTL_SEC"""
+
+def is_transient_error(error):
+    if isinstance(error, (TimeoutError, ServiceRequestError, ServiceResponseError)):
+        return True
+    return isinstance(error, HttpResponseError) and error.status_code in (429, 503)
+
+@dataclass(slots=True)
+class CachedResult:
+    """Agent response served from the cache, duck-typed like the SDK result"""
+    text: str
+    usage: dict | None = None
+
+class LocalLRUCache:
+    """Bounded in-process cache placed in front of Redis, with the same expiry"""
+
+    def __init__(self, maxsize=1024, ttl=CACHE_TTL_SEC):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+LOCAL_CACHE_SIZE = int(os.environ.get("LOCAL_CACHE_SIZE", "1024"))
+
+class CacheStats:
+    """Per-agent cache hit/miss counters and cumulative lookup latency"""
+
+    # Below this hit-rate the cache costs more round-trips than it saves
+    LOW_HIT_RATE = 0.3
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+        self.set_errors = {}
+        self.lookup_seconds = 0.0
+
+    def record_lookup(self, agent_name, hit, elapsed):
+        counter = self.hits if hit else self.misses
+        with self._lock:
+            counter[agent_name] = counter.get(agent_name, 0) + 1
+            self.lookup_seconds += elapsed
+
+    def record_set_error(self, agent_name):
+        with self._lock:
+            self.set_errors[agent_name] = self.set_errors.get(agent_name, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            hits = sum(self.hits.values())
+            misses = sum(self.misses.values())
+            lookups = hits + misses
+            return {
+                "hits": hits,
+                "misses": misses,
+                "set_errors": sum(self.set_errors.values()),
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "avg_lookup_us": self.lookup_seconds / lookups * 1e6 if lookups else 0.0,
+                "per_agent": {
+                    name: {"hits": self.hits.get(name, 0), "misses": self.misses.get(name, 0)}
+                    for name in self.hits.keys() | self.misses.keys()
+                },
+            }
+
+    def log_summary(self):
+        stats = self.snapshot()
+        if not stats["hits"] and not stats["misses"]:
+            return
+        logger.info(
+            "Agent cache: %d hits, %d misses, %d set errors, hit rate %.1f%%, avg lookup %.0f µs",
+            stats["hits"], stats["misses"], stats["set_errors"],
+            stats["hit_rate"] * 100, stats["avg_lookup_us"]
+        )
+        if stats["hit_rate"] < self.LOW_HIT_RATE:
+            logger.warning("Agent cache hit rate is below %.0f%%; review TTL and key design",
+                           self.LOW_HIT_RATE * 100)
+
+cache_stats = CacheStats()
+
+async def call_run(orig_run, prompt, *args, **kwargs):
+    """Invoke a run method that may be a coroutine function or a plain callable"""
+    result = orig_run(prompt, *args, **kwargs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+def make_cached_run(orig_run, cache, agent_name):
+    """Wrap a chat client's run method so responses are served from the cache"""
+    local_cache = LocalLRUCache(LOCAL_CACHE_SIZE)
+
+    @functools.wraps(orig_run)
+    async def wrapper(prompt, *args, **kwargs):
+        key = agent_cache_key(agent_name, prompt)
+        start = time.perf_counter()
+        payload = local_cache.get(key)
+        if payload is not None:
+            cache_stats.record_lookup(agent_name, True, time.perf_counter() - start)
+            return CachedResult(**payload)
+
+        error_key = key + ERROR_KEY_SUFFIX
+        if cache:
+            # An unreachable Redis or a corrupt entry degrades to a miss, never a failed call
+            try:
+                cached, failure = await cache.mget(key, error_key)
+            except redis.RedisError:
+                cached = failure = None
+            if cached is not None:
+                try:
+                    payload = decode_cached_payload(cached)
+                except (zlib.error, orjson.JSONDecodeError):
+                    payload = None
+            cache_stats.record_lookup(agent_name, payload is not None, time.perf_counter() - start)
+            if payload is not None:
+                local_cache.set(key, payload)
+                return CachedResult(**payload)
+            if failure is not None:
+                raise CachedFailureError(
+                    f"{agent_name} failed recently with {failure.decode()}; "
+                    f"retry after {NEGATIVE_CACHE_TTL_SEC}s"
+                )
+        else:
+            cache_stats.record_lookup(agent_name, False, time.perf_counter() - start)
+        try:
+            result = await call_run(orig_run, prompt, *args, **kwargs)
+        except Exception as e:
+            if cache and is_transient_error(e):
+                try:
+                    await cache.setex(error_key, NEGATIVE_CACHE_TTL_SEC, type(e).__name__)
+                except redis.RedisError:
+                    cache_stats.record_set_error(agent_name)
+            raise
+        payload = result_payload(result)
+        local_cache.set(key, payload)
+        if cache:
+            try:
+                await cache.set(key, encode_cached_payload(payload), ex=CACHE_TTL_SEC)
+            except redis.RedisError:
+                cache_stats.record_set_error(agent_name)
+        return result
+    return wrapper
 
 def launch_all_mode(port: int = 8080):
     """Launch DevUI with all entities in-memory"""
@@ -132,14 +391,8 @@ def launch_all_mode(port: int = 8080):
     
     # Import all entities
     try:
-        from devui.customer_data_agent import agent as customer_agent
-        from devui.risk_analyser_agent import agent as risk_agent
-        from devui.compliance_report_agent import agent as compliance_agent
-        from devui.fraud_detection_workflow import workflow
-
-
+        entities = load_entities(list(ENTITY_MODULES))
         cache = get_cache()
-        entities = [customer_agent, risk_agent, compliance_agent, workflow]
 
         print(f"🚀 Launching DevUI with all entities on port {port}")
         print("🤖 Available agents:")
@@ -154,19 +407,11 @@ def launch_all_mode(port: int = 8080):
         print("   • Test different transaction IDs (TX1001, TX2002, etc.)")
 
 
-        # Patch agents to use cache
+        # Patch agents to use cache; the local tier works even without Redis
+        atexit.register(cache_stats.log_summary)
         for agent in entities:
             if hasattr(agent, 'chat_client'):
-                orig_run = agent.chat_client.run
-                def cached_run(prompt, *args, **kwargs):
-                    key = cache_key(prompt)
-                    if cache and cache.exists(key):
-                        return type('Result', (), {'text': cache.get(key).decode()})()
-                    result = orig_run(prompt, *args, **kwargs)
-                    if cache:
-                        cache.set(key, result.text)
-                    return result
-                agent.chat_client.run = cached_run
+                agent.chat_client.run = make_cached_run(agent.chat_client.run, cache, agent.name)
 
         serve(entities=entities, port=port, auto_open=True)
 
@@ -175,12 +420,10 @@ def launch_all_mode(port: int = 8080):
         print("Make sure all agent and workflow modules are properly configured.")
         sys.exit(1)
 
-def main():
-    """Main function to parse arguments and launch DevUI"""
-    parser = argparse.ArgumentParser(
-        description="Azure Trust Agents DevUI Launcher",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
+# Entities are imported relative to the devui package, so the launcher runs as a module
+LAUNCHER_PROG = "python -m devui.devui_launcher"
+
+LAUNCHER_EPILOG = """
 Examples:
   %(prog)s                           # Launch all entities (default)
   %(prog)s --mode directory          # Use directory discovery
@@ -188,7 +431,7 @@ Examples:
   %(prog)s --mode workflow           # Launch workflow only
   %(prog)s --mode all --port 8080    # Launch all entities on port 8080
 
-Environment Variables Required:
+Environment Variables Required (all modes except directory):
   AI_FOUNDRY_PROJECT_ENDPOINT   - Azure AI Foundry project endpoint
   MODEL_DEPLOYMENT_NAME         - Model deployment name
   COSMOS_ENDPOINT              - Cosmos DB endpoint
@@ -196,7 +439,18 @@ Environment Variables Required:
 
 Optional:
   AZURE_AI_CONNECTION_ID       - Azure AI Search connection ID
-        """
+  CACHE_TTL_SEC                - Expiry of cached agent responses (default: 3600)
+  LOCAL_CACHE_SIZE             - In-process responses kept per agent (default: 1024)
+"""
+
+@functools.lru_cache(maxsize=1)
+def build_parser():
+    """Build the launcher's argument parser once and reuse it"""
+    parser = argparse.ArgumentParser(
+        prog=LAUNCHER_PROG,
+        description="Azure Trust Agents DevUI Launcher",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=LAUNCHER_EPILOG
     )
     
     parser.add_argument(
@@ -219,8 +473,17 @@ Optional:
         help="Skip environment variable validation"
     )
     
-    args = parser.parse_args()
+    return parser
+
+def main():
+    """Main function to parse arguments and launch DevUI"""
+    args = build_parser().parse_args()
     
+    # Every mode but directory discovery imports entities relative to this package
+    if args.mode != "directory" and not __package__:
+        print(f"❌ Run the launcher as a module from challenge-1: {LAUNCHER_PROG} --mode {args.mode}")
+        sys.exit(1)
+
     # Setup logging
     setup_logging()
     
@@ -229,12 +492,9 @@ Optional:
     print("=" * 60)
     
     # Check environment variables unless skipped
-    if not args.no_env_check and not check_environment():
+    if not args.no_env_check and not check_environment(REQUIRED_BY_MODE[args.mode]):
         sys.exit(1)
     
-    # Change to the DevUI directory
-    os.chdir(current_dir)
-    
     try:
         if args.mode == "directory":
             launch_directory_mode(args.port)
@@ -1,14 +1,22 @@
 import asyncio
+import logging
 import os
 import re
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from typing import Final
+import aiohttp
+import numpy as np
+import orjson
 from typing_extensions import Never
 from agent_framework import WorkflowBuilder, WorkflowContext, WorkflowOutputEvent, executor, ChatAgent
 from agent_framework.azure import AzureAIAgentClient
-from azure.identity.aio import AzureCliCredential
-from azure.ai.projects import AIProjectClient
-from azure.identity import DefaultAzureCredential
-from azure.cosmos import CosmosClient
+from azure.identity.aio import DefaultAzureCredential as AsyncDefaultAzureCredential
+from azure.ai.projects.aio import AIProjectClient
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.cosmos.aio import CosmosClient
+from azure.cosmos.exceptions import CosmosResourceNotFoundError
 from dotenv import load_dotenv
 from pydantic import BaseModel
 from azure.ai.agents.models import (
@@ -24,56 +32,209 @@ import time
 # Load environment variables
 load_dotenv(override=True)
 
-# Initialize Cosmos DB connection
-cosmos_endpoint = os.environ.get("COSMOS_ENDPOINT")
-cosmos_key = os.environ.get("COSMOS_KEY")
-cosmos_client = CosmosClient(cosmos_endpoint, cosmos_key)
-database = cosmos_client.get_database_client("FinancialComplianceDB")
-customers_container = database.get_container_client("Customers")
-transactions_container = database.get_container_client("Transactions")
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Workflow configuration, read from the environment once at import"""
+    cosmos_endpoint: str | None
+    cosmos_key: str | None
+    project_endpoint: str | None
+    model_deployment_name: str
+    mcp_server_endpoint: str | None
+    apim_subscription_key: str | None
+    risk_analyser_agent_id: str | None
+    compliance_report_agent_id: str | None
+    fraud_alert_agent_id: str | None
+
+
+SETTINGS = Settings(
+    cosmos_endpoint=os.environ.get("COSMOS_ENDPOINT"),
+    cosmos_key=os.environ.get("COSMOS_KEY"),
+    project_endpoint=os.environ.get("AI_FOUNDRY_PROJECT_ENDPOINT"),
+    model_deployment_name=os.environ.get("MODEL_DEPLOYMENT_NAME", "gpt-4o-mini"),
+    mcp_server_endpoint=os.environ.get("MCP_SERVER_ENDPOINT"),
+    apim_subscription_key=os.environ.get("APIM_SUBSCRIPTION_KEY"),
+    risk_analyser_agent_id=os.environ.get("RISK_ANALYSER_AGENT_ID"),
+    compliance_report_agent_id=os.environ.get("COMPLIANCE_REPORT_AGENT_ID"),
+    fraud_alert_agent_id=os.environ.get("FRAUD_ALERT_AGENT_ID"),
+)
+
+
+@lru_cache(maxsize=1)
+def get_cosmos_session() -> aiohttp.ClientSession:
+    """aiohttp session behind the Cosmos DB client, created on first use inside the event loop.
+
+    The pool is sized for the workflow's concurrent reads and keeps connections
+    alive long enough to avoid TLS reconnects between transactions.
+    """
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, keepalive_timeout=120)
+    )
+
+
+@lru_cache(maxsize=1)
+def get_cosmos_client() -> CosmosClient:
+    """Process-wide async Cosmos DB client; close_clients() releases it"""
+    transport = AioHttpTransport(session=get_cosmos_session(), session_owner=False)
+    return CosmosClient(SETTINGS.cosmos_endpoint, SETTINGS.cosmos_key, transport=transport)
+
+
+@lru_cache(maxsize=None)
+def get_container(name: str):
+    """Container client for the FinancialComplianceDB database"""
+    return get_cosmos_client().get_database_client("FinancialComplianceDB").get_container_client(name)
+
+class CosmosFetchError(Exception):
+    """Raised when a Cosmos DB query fails"""
+
 
 # Cosmos DB helper functions
+# Containers are partitioned on /id, which the seed script sets to the
+# transaction_id / customer_id, so single-document lookups are point reads.
 
 
-def get_transaction_data(transaction_id: str) -> dict:
+async def get_transaction_data(transaction_id: str) -> dict:
     """Get transaction data from Cosmos DB"""
     try:
-        query = f"SELECT * FROM c WHERE c.transaction_id = '{transaction_id}'"
-        items = list(transactions_container.query_items(
-            query=query,
-            enable_cross_partition_query=True
-        ))
-        return items[0] if items else {"error": f"Transaction {transaction_id} not found"}
+        return await get_container("Transactions").read_item(item=transaction_id, partition_key=transaction_id)
+    except CosmosResourceNotFoundError:
+        return {"error": f"Transaction {transaction_id} not found"}
     except Exception as e:
         return {"error": str(e)}
 
 
-def get_customer_data(customer_id: str) -> dict:
+async def get_customer_data(customer_id: str) -> dict:
     """Get customer data from Cosmos DB"""
     try:
-        query = f"SELECT * FROM c WHERE c.customer_id = '{customer_id}'"
-        items = list(customers_container.query_items(
-            query=query,
-            enable_cross_partition_query=True
-        ))
-        return items[0] if items else {"error": f"Customer {customer_id} not found"}
+        return await get_container("Customers").read_item(item=customer_id, partition_key=customer_id)
+    except CosmosResourceNotFoundError:
+        return {"error": f"Customer {customer_id} not found"}
     except Exception as e:
         return {"error": str(e)}
 
 
-def get_customer_transactions(customer_id: str) -> list:
-    """Get all transactions for a customer from Cosmos DB"""
+async def get_customer_transaction_features(customer_id: str) -> list:
+    """Get the fraud-relevant fields of all transactions for a customer from Cosmos DB"""
     try:
-        query = f"SELECT * FROM c WHERE c.customer_id = '{customer_id}'"
-        items = list(transactions_container.query_items(
-            query=query,
-            enable_cross_partition_query=True
-        ))
+        # Transactions are partitioned by their own id, so this query spans partitions;
+        # projecting only the feature fields keeps the payload and RU charge small
+        items = [item async for item in get_container("Transactions").query_items(
+            query="SELECT c.transaction_id, c.amount, c.destination_country, c.timestamp "
+                  "FROM c WHERE c.customer_id = @customer_id",
+            parameters=[{"name": "@customer_id", "value": customer_id}]
+        )]
         return items
     except Exception as e:
-        return [{"error": str(e)}]
+        raise CosmosFetchError(
+            f"Failed to fetch transactions for customer {customer_id}: {e}") from e
+
+# Azure AI agent clients
+
+
+@lru_cache(maxsize=1)
+def get_async_credential() -> AsyncDefaultAzureCredential:
+    """Process-wide async credential so tokens are reused across workflow runs"""
+    return AsyncDefaultAzureCredential()
+
+
+# Long-lived chat clients keyed by (agent id, model deployment); kept in a dict
+# rather than an lru_cache so close_clients() can reach them
+_agent_clients: dict = {}
+
+
+def get_agent_client(agent_id: str, model_deployment_name: str) -> AzureAIAgentClient:
+    """Long-lived AzureAIAgentClient per agent, reused by every executor invocation"""
+    key = (agent_id, model_deployment_name)
+    client = _agent_clients.get(key)
+    if client is None:
+        client = _agent_clients[key] = AzureAIAgentClient(
+            project_endpoint=SETTINGS.project_endpoint,
+            model_deployment_name=model_deployment_name,
+            async_credential=get_async_credential(),
+            agent_id=agent_id
+        )
+    return client
+
+
+@lru_cache(maxsize=1)
+def get_project_client() -> AIProjectClient:
+    """Process-wide async AI Foundry project client, shared by every fraud alert run"""
+    return AIProjectClient(
+        endpoint=SETTINGS.project_endpoint,
+        credential=get_async_credential(),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_fraud_alert_mcp_tool() -> McpTool:
+    """Fraud alert MCP tool, configured once per process"""
+    mcp_tool = McpTool(
+        server_label="fraudalertmcp",
+        server_url=SETTINGS.mcp_server_endpoint,
+    )
+    mcp_tool.update_headers(
+        "Ocp-Apim-Subscription-Key", SETTINGS.apim_subscription_key)
+    # Every fraud alert MCP call is pre-approved, so skip the requires_action round-trip
+    mcp_tool.set_approval_mode("never")
+    return mcp_tool
+
+
+# Agent handles keyed by agent id, fetched once. The MCP tool reaches each run
+# through tool_resources, so the handle itself is never modified.
+# The lock keeps concurrent workflow runs from all fetching the same agent.
+_fraud_agents: dict = {}
+_fraud_agents_lock = asyncio.Lock()
+
+
+async def get_fraud_alert_agent(agents_client, agent_id: str):
+    """Get the fraud alert agent, fetching it on first use only"""
+    agent = _fraud_agents.get(agent_id)
+    if agent is not None:
+        return agent
+    async with _fraud_agents_lock:
+        agent = _fraud_agents.get(agent_id)
+        if agent is None:
+            agent = _fraud_agents[agent_id] = await agents_client.get_agent(agent_id)
+    return agent
+
+def to_json(obj) -> str:
+    """Serialize workflow data for embedding in agent prompts"""
+    return orjson.dumps(obj, default=str).decode()
+
+
+def truncate(text: str, limit: int) -> str:
+    """Shortens text to limit characters, marking the cut with an ellipsis"""
+    return text if len(text) <= limit else f"{text[:limit]}..."
+
+async def close_clients() -> None:
+    """Close the process-wide clients and forget them.
+
+    The clients are bound to the event loop they were created in, so this must
+    run before that loop ends; the next workflow run then creates fresh ones.
+    """
+    global _fraud_agents_lock
+    for client in _agent_clients.values():
+        await client.close()
+    _agent_clients.clear()
+    if get_project_client.cache_info().currsize:
+        await get_project_client().close()
+    if get_cosmos_client.cache_info().currsize:
+        await get_cosmos_client().close()
+    if get_cosmos_session.cache_info().currsize:
+        await get_cosmos_session().close()
+    if get_async_credential.cache_info().currsize:
+        await get_async_credential().close()
+    for cached in (get_container, get_cosmos_client, get_cosmos_session,
+                   get_project_client, get_async_credential):
+        cached.cache_clear()
+    # The agent handles are plain data, but the lock belongs to the old loop
+    _fraud_agents_lock = asyncio.Lock()
 
 # Request/Response models
+# Only AnalysisRequest comes from outside the workflow; executors build the
+# response models from trusted data with model_construct() to skip validation.
 
 
 class AnalysisRequest(BaseModel):
@@ -130,6 +291,62 @@ class FraudAlertResponse(BaseModel):
     reasoning: str = ""
 
 
+# Destination countries treated as high risk
+HIGH_RISK_COUNTRIES = frozenset(
+    {'IR', 'RU', 'NG', 'KP', 'YE', 'AF', 'SY', 'SO', 'LY', 'IQ', 'MM', 'BY', 'VE'})
+HIGH_RISK_COUNTRY_ARRAY = np.array(sorted(HIGH_RISK_COUNTRIES), dtype=str)
+
+
+def summarize_transaction_history(transaction_history: list) -> dict:
+    """Computes fraud indicators over a customer's history as column arrays in one pass."""
+    count = len(transaction_history)
+    amounts = np.fromiter(
+        (t.get('amount') or 0 for t in transaction_history), dtype=np.float64, count=count)
+    # dtype=str sizes the array to the longest value, so codes are never truncated
+    # and np.isin matches exactly like the HIGH_RISK_COUNTRIES frozenset
+    destinations = np.array(
+        [t.get('destination_country') or '' for t in transaction_history], dtype=str)
+    return {
+        "count": count,
+        "total_amount": float(amounts.sum()),
+        "high_amount_count": int(np.count_nonzero(amounts > 10000)),
+        "high_risk_country_count": int(np.count_nonzero(np.isin(destinations, HIGH_RISK_COUNTRY_ARRAY))),
+    }
+
+
+CUSTOMER_ANALYSIS_TEMPLATE = """
+COSMOS DB DATA ANALYSIS:
+
+Transaction {transaction_id}:
+- Amount: ${amount} {currency}
+- Customer: {customer_id}
+- Destination: {destination}
+- Timestamp: {timestamp}
+
+Customer Profile ({customer_id}):
+- Name: {name}
+- Country: {country}
+- Account Age: {account_age} days
+- Device Trust Score: {device_trust}
+- Past Fraud: {past_fraud}
+
+Transaction History:
+- Total Transactions: {history_count}
+- Total Amount: ${history_total_amount:.2f}
+- High Amount Transactions: {history_high_amount_count}
+- High Risk Country Transactions: {history_high_risk_country_count}
+
+FRAUD RISK INDICATORS:
+- High Amount: {is_high_amount}
+- High Risk Country: {is_high_risk_country}
+- New Account: {is_new_account}
+- Low Device Trust: {is_low_device_trust}
+- Past Fraud History: {past_fraud}
+
+Ready for risk assessment analysis.
+"""
+
+
 @executor
 async def customer_data_executor(
     request: AnalysisRequest,
@@ -139,10 +356,10 @@ async def customer_data_executor(
 
     try:
         # Get real data from Cosmos DB
-        transaction_data = get_transaction_data(request.transaction_id)
+        transaction_data = await get_transaction_data(request.transaction_id)
 
         if "error" in transaction_data:
-            result = CustomerDataResponse(
+            result = CustomerDataResponse.model_construct(
                 customer_data=f"Error: {transaction_data}",
                 transaction_data="Error in Cosmos DB retrieval",
                 transaction_id=request.transaction_id,
@@ -150,55 +367,65 @@ async def customer_data_executor(
             )
         else:
             customer_id = transaction_data.get("customer_id")
-            customer_data = get_customer_data(customer_id)
-            transaction_history = get_customer_transactions(customer_id)
-
-            # Create comprehensive analysis
-            analysis_text = f"""
-COSMOS DB DATA ANALYSIS:
-
-Transaction {request.transaction_id}:
-- Amount: ${transaction_data.get('amount')} {transaction_data.get('currency')}
-- Customer: {customer_id}
-- Destination: {transaction_data.get('destination_country')}
-- Timestamp: {transaction_data.get('timestamp')}
-
-Customer Profile ({customer_id}):
-- Name: {customer_data.get('name')}
-- Country: {customer_data.get('country')}
-- Account Age: {customer_data.get('account_age_days')} days
-- Device Trust Score: {customer_data.get('device_trust_score')}
-- Past Fraud: {customer_data.get('past_fraud')}
-
-Transaction History:
-- Total Transactions: {len(transaction_history) if isinstance(transaction_history, list) else 0}
+            customer_data, transaction_history = await asyncio.gather(
+                get_customer_data(customer_id),
+                get_customer_transaction_features(customer_id)
+            )
+            history_summary = summarize_transaction_history(transaction_history)
 
-FRAUD RISK INDICATORS:
-- High Amount: {transaction_data.get('amount', 0) > 10000}
-- High Risk Country: {transaction_data.get('destination_country') in ['IR', 'RU', 'NG', 'KP', 'YE', 'AF', 'SY', 'SO', 'LY', 'IQ', 'MM', 'BY', 'VE']}
-- New Account: {customer_data.get('account_age_days', 0) < 30}
-- Low Device Trust: {customer_data.get('device_trust_score', 1.0) < 0.5}
-- Past Fraud History: {customer_data.get('past_fraud', False)}
+            # Bind each field once, then render the analysis template
+            amount = transaction_data.get('amount')
+            destination = transaction_data.get('destination_country')
+            account_age = customer_data.get('account_age_days')
+            device_trust = customer_data.get('device_trust_score')
+            past_fraud = customer_data.get('past_fraud', False)
 
-Ready for risk assessment analysis.
-"""
+            analysis_text = CUSTOMER_ANALYSIS_TEMPLATE.format(
+                transaction_id=request.transaction_id,
+                amount=amount,
+                currency=transaction_data.get('currency'),
+                customer_id=customer_id,
+                destination=destination,
+                timestamp=transaction_data.get('timestamp'),
+                name=customer_data.get('name'),
+                country=customer_data.get('country'),
+                account_age=account_age,
+                device_trust=device_trust,
+                past_fraud=past_fraud,
+                history_count=history_summary['count'],
+                history_total_amount=history_summary['total_amount'],
+                history_high_amount_count=history_summary['high_amount_count'],
+                history_high_risk_country_count=history_summary['high_risk_country_count'],
+                is_high_amount=(amount or 0) > 10000,
+                is_high_risk_country=destination in HIGH_RISK_COUNTRIES,
+                is_new_account=(account_age if account_age is not None else 0) < 30,
+                is_low_device_trust=(device_trust if device_trust is not None else 1.0) < 0.5
+            )
 
-            result = CustomerDataResponse(
+            result = CustomerDataResponse.model_construct(
                 customer_data=analysis_text,
                 transaction_data=f"Workflow analysis for {request.transaction_id}",
                 transaction_id=request.transaction_id,
                 status="SUCCESS",
                 raw_transaction=transaction_data,
                 raw_customer=customer_data,
-                transaction_history=transaction_history if isinstance(
-                    transaction_history, list) else []
+                transaction_history=transaction_history
             )
 
         # Send data to next executor
         await ctx.send_message(result)
 
+    except CosmosFetchError as e:
+        error_result = CustomerDataResponse.model_construct(
+            customer_data=f"Error: {e}",
+            transaction_data="Error in Cosmos DB retrieval",
+            transaction_id=request.transaction_id,
+            status="ERROR"
+        )
+        await ctx.send_message(error_result)
+
     except Exception as e:
-        error_result = CustomerDataResponse(
+        error_result = CustomerDataResponse.model_construct(
             customer_data=f"Error retrieving data: {str(e)}",
             transaction_data="Error occurred during data retrieval",
             transaction_id=request.transaction_id,
@@ -208,6 +435,41 @@ Ready for risk assessment analysis.
 
 # Compliance Report Functions
 
+RISK_SCORE_RE = re.compile(r'risk\s*score[:\s]*(\d+(?:\.\d+)?)', re.IGNORECASE)
+RISK_LEVEL_RE = re.compile(r'risk\s*level[:\s]*(\w+)', re.IGNORECASE)
+TRANSACTION_ID_RE = re.compile(r'transaction[:\s]*([A-Z0-9]+)')
+# Matched as substrings so demonyms such as "Syrian" or "Iranians" count too
+HIGH_RISK_COUNTRY_NAME_RE = re.compile(
+    r'(?:russia|iran|north korea|syria|yemen)', re.IGNORECASE)
+
+# Every phrase the risk scoring and risk factor rules look for
+RISK_PHRASES = (
+    "high-risk country", "high risk country", "no high-risk", "not high-risk", "low-risk", "not in",
+    "large amount", "high amount", "not large", "not high", "below", "under",
+    "suspicious", "not suspicious", "no suspicious", "no triggering",
+    "sanction", "sanctions", "sanctions concern", "sanctions flag", "sanctions match",
+    "sanctions risk", "no sanctions", "no sanctions flag", "sanctions check clear",
+    "frequent", "unusual frequency", "not frequent", "normal frequency",
+    "block", "high risk", "medium risk",
+)
+# A zero-width lookahead reports overlapping phrases in a single scan; longest first
+RISK_PHRASE_RE = re.compile(
+    "(?=(" + "|".join(re.escape(p) for p in sorted(RISK_PHRASES, key=len, reverse=True)) + "))",
+    re.IGNORECASE)
+# A phrase match also implies every shorter phrase it contains
+RISK_PHRASE_CLOSURE = {
+    phrase: frozenset(other for other in RISK_PHRASES if other in phrase)
+    for phrase in RISK_PHRASES
+}
+
+
+def find_risk_phrases(text: str) -> set:
+    """Returns the RISK_PHRASES occurring in text, matched case-insensitively in one pass."""
+    found = set()
+    for match in RISK_PHRASE_RE.finditer(text):
+        found |= RISK_PHRASE_CLOSURE.get(match.group(1).lower(), frozenset())
+    return found
+
 
 def parse_risk_analysis_result(risk_analysis_text: str) -> dict:
     """Parses risk analyser output to extract key audit information."""
@@ -218,11 +480,10 @@ def parse_risk_analysis_result(risk_analysis_text: str) -> dict:
             "audit_findings": []
         }
 
-        text_lower = risk_analysis_text.lower()
+        found = find_risk_phrases(risk_analysis_text)
 
         # Extract risk score - try multiple patterns
-        risk_score_pattern = r'risk\s*score[:\s]*(\d+(?:\.\d+)?)'
-        score_match = re.search(risk_score_pattern, text_lower)
+        score_match = RISK_SCORE_RE.search(risk_analysis_text)
         if score_match:
             analysis_data["parsed_elements"]["risk_score"] = float(
                 score_match.group(1))
@@ -231,25 +492,25 @@ def parse_risk_analysis_result(risk_analysis_text: str) -> dict:
             calculated_score = 0.0
 
             # High-risk countries should automatically get high scores
-            if any(country in text_lower for country in ['russia', 'russian', 'iran', 'iranian', 'north korea', 'syria', 'yemen']):
+            if HIGH_RISK_COUNTRY_NAME_RE.search(risk_analysis_text):
                 calculated_score += 80
-            elif "high-risk country" in text_lower or "high risk country" in text_lower:
+            elif found & {"high-risk country", "high risk country"}:
                 calculated_score += 75
-            elif "sanctions" in text_lower:
+            elif "sanctions" in found:
                 calculated_score += 85
 
             # Large amounts increase risk
-            if "large amount" in text_lower or "high amount" in text_lower:
+            if found & {"large amount", "high amount"}:
                 calculated_score += 20
 
             # Suspicious patterns
-            if "suspicious" in text_lower and "not suspicious" not in text_lower:
+            if "suspicious" in found and "not suspicious" not in found:
                 calculated_score += 30
 
             # Block/High Risk recommendations
-            if "block" in text_lower or "high risk" in text_lower:
+            if found & {"block", "high risk"}:
                 calculated_score = max(calculated_score, 80)
-            elif "medium risk" in text_lower:
+            elif "medium risk" in found:
                 calculated_score = max(calculated_score, 60)
 
             # Cap at 100
@@ -257,15 +518,13 @@ def parse_risk_analysis_result(risk_analysis_text: str) -> dict:
             analysis_data["parsed_elements"]["risk_score"] = calculated_score
 
         # Extract risk level
-        risk_level_pattern = r'risk\s*level[:\s]*(\w+)'
-        level_match = re.search(risk_level_pattern, text_lower)
+        level_match = RISK_LEVEL_RE.search(risk_analysis_text)
         if level_match:
             analysis_data["parsed_elements"]["risk_level"] = level_match.group(
                 1).upper()
 
         # Extract transaction ID
-        tx_pattern = r'transaction[:\s]*([A-Z0-9]+)'
-        tx_match = re.search(tx_pattern, risk_analysis_text)
+        tx_match = TRANSACTION_ID_RE.search(risk_analysis_text)
         if tx_match:
             analysis_data["parsed_elements"]["transaction_id"] = tx_match.group(
                 1)
@@ -274,23 +533,23 @@ def parse_risk_analysis_result(risk_analysis_text: str) -> dict:
         risk_factors = []
 
         # Only flag high-risk country if it's actually mentioned as a concern
-        if ("high-risk country" in text_lower or "high risk country" in text_lower) and not any(phrase in text_lower for phrase in ["not in", "no high-risk", "not high-risk", "low-risk"]):
+        if found & {"high-risk country", "high risk country"} and not found & {"not in", "no high-risk", "not high-risk", "low-risk"}:
             risk_factors.append("HIGH_RISK_JURISDICTION")
 
         # Only flag large amounts if mentioned as problematic
-        if ("large amount" in text_lower or "high amount" in text_lower) and not any(phrase in text_lower for phrase in ["below", "under", "not large", "not high"]):
+        if found & {"large amount", "high amount"} and not found & {"below", "under", "not large", "not high"}:
             risk_factors.append("UNUSUAL_AMOUNT")
 
         # Only flag suspicious if it's a concern, not if it says "no suspicious"
-        if "suspicious" in text_lower and not any(phrase in text_lower for phrase in ["no suspicious", "not suspicious", "no triggering"]):
+        if "suspicious" in found and not found & {"no suspicious", "not suspicious", "no triggering"}:
             risk_factors.append("SUSPICIOUS_PATTERN")
 
         # Only flag sanctions if there's an actual concern, not if it says "no sanctions"
-        if "sanction" in text_lower and any(phrase in text_lower for phrase in ["sanctions concern", "sanctions flag", "sanctions match", "sanctions risk"]) and not any(phrase in text_lower for phrase in ["no sanctions", "sanctions check clear", "no sanctions flag"]):
+        if "sanction" in found and found & {"sanctions concern", "sanctions flag", "sanctions match", "sanctions risk"} and not found & {"no sanctions", "sanctions check clear", "no sanctions flag"}:
             risk_factors.append("SANCTIONS_CONCERN")
 
         # Only flag frequency issues if mentioned as problematic
-        if ("frequent" in text_lower or "unusual frequency" in text_lower) and not any(phrase in text_lower for phrase in ["not frequent", "normal frequency"]):
+        if found & {"frequent", "unusual frequency"} and not found & {"not frequent", "normal frequency"}:
             risk_factors.append("FREQUENCY_ANOMALY")
 
         analysis_data["parsed_elements"]["risk_factors"] = risk_factors
@@ -302,6 +561,30 @@ def parse_risk_analysis_result(risk_analysis_text: str) -> dict:
 
 def generate_audit_report_from_risk_analysis(risk_analysis_text: str, report_type: str = "TRANSACTION_AUDIT") -> dict:
     """Generates a formal audit report based on risk analyser findings."""
+    audit_core = _audit_report_core(risk_analysis_text, report_type)
+    if "error" in audit_core:
+        return dict(audit_core)
+
+    # One clock read for both fields; the ns suffix keeps ids unique within a second
+    now = datetime.now()
+    report_suffix = f"{time.time_ns() & 0xFFFF:04x}"
+
+    # Copy every nested container so callers cannot modify the cached report
+    return {
+        "audit_report_id": f"AUDIT_{now:%Y%m%d_%H%M%S}_{report_suffix}",
+        "generated_timestamp": now.isoformat(),
+        **audit_core,
+        "executive_summary": dict(audit_core["executive_summary"]),
+        "detailed_findings": {
+            name: list(findings) for name, findings in audit_core["detailed_findings"].items()
+        },
+        "compliance_status": dict(audit_core["compliance_status"]),
+    }
+
+
+@lru_cache(maxsize=1024)
+def _audit_report_core(risk_analysis_text: str, report_type: str) -> dict:
+    """Builds the deterministic part of an audit report; cached per analysis text."""
     try:
         parsed_analysis = parse_risk_analysis_result(risk_analysis_text)
 
@@ -311,9 +594,7 @@ def generate_audit_report_from_risk_analysis(risk_analysis_text: str, report_typ
         elements = parsed_analysis["parsed_elements"]
 
         audit_report = {
-            "audit_report_id": f"AUDIT_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
             "report_type": report_type,
-            "generated_timestamp": datetime.now().isoformat(),
             "auditor": "Compliance Report Agent",
             "source_analysis": "Risk Analyser Agent",
 
@@ -392,43 +673,10 @@ def generate_audit_report_from_risk_analysis(risk_analysis_text: str, report_typ
         return {"error": f"Failed to generate audit report: {str(e)}"}
 
 
-@executor
-async def risk_analyzer_executor(
-    customer_response: CustomerDataResponse,
-    ctx: WorkflowContext[RiskAnalysisResponse]
-) -> None:
-    """Risk Analyzer Executor that processes customer data and sends to parallel executors."""
-
-    try:
-        # Configuration
-        project_endpoint = os.environ.get("AI_FOUNDRY_PROJECT_ENDPOINT")
-        model_deployment_name = os.environ.get(
-            "MODEL_DEPLOYMENT_NAME", "gpt-4o-mini")
-        RISK_ANALYSER_AGENT_ID = os.getenv("RISK_ANALYSER_AGENT_ID")
-
-        if not RISK_ANALYSER_AGENT_ID:
-            raise ValueError("RISK_ANALYSER_AGENT_ID required")
-
-        async with AzureCliCredential() as credential:
-            risk_client = AzureAIAgentClient(
-                project_endpoint=project_endpoint,
-                model_deployment_name=model_deployment_name,
-                async_credential=credential,
-                agent_id=RISK_ANALYSER_AGENT_ID
-            )
-
-            async with risk_client as client:
-                risk_agent = ChatAgent(
-                    chat_client=client,
-                    model_id=model_deployment_name,
-                    store=True
-                )
-
-                # Create risk assessment prompt
-                risk_prompt = f"""
+RISK_PROMPT_TEMPLATE = """
 Based on the comprehensive fraud analysis provided below, please provide your expert regulatory and compliance risk assessment:
 
-Analysis Data: {customer_response.customer_data}
+Analysis Data: {customer_data}
 
 Please focus on:
 1. Validating the risk factors identified in the analysis
@@ -438,45 +686,81 @@ Please focus on:
 5. Final recommendation on transaction approval/blocking/investigation
 6. Regulatory reporting requirements if any
 
-Transaction ID: {customer_response.transaction_id}
+Transaction ID: {transaction_id}
 
 Provide a structured risk assessment with clear regulatory justification.
 """
 
-                result = await risk_agent.run(risk_prompt)
-                result_text = result.text if result and hasattr(
-                    result, 'text') else "No response from risk agent"
-
-                # Parse structured risk data
-                risk_factors = []
-                recommendation = "INVESTIGATE"  # Default
-                compliance_notes = ""
-
-                if "HIGH RISK" in result_text.upper() or "BLOCK" in result_text.upper():
-                    recommendation = "BLOCK"
-                    risk_factors.append("High risk transaction identified")
-                elif "LOW RISK" in result_text.upper() or "APPROVE" in result_text.upper():
-                    recommendation = "APPROVE"
-
-                if "IRAN" in result_text.upper() or "SANCTIONS" in result_text.upper():
-                    compliance_notes = "Sanctions compliance review required"
-
-                final_result = RiskAnalysisResponse(
-                    customer_data=customer_response.customer_data,
-                    risk_analysis=result_text,
-                    risk_score="Assessed by Risk Agent based on Cosmos DB data",
-                    transaction_id=customer_response.transaction_id,
-                    status="SUCCESS",
-                    risk_factors=risk_factors,
-                    recommendation=recommendation,
-                    compliance_notes=compliance_notes
-                )
+# Signals read from the risk agent's reply; matched as substrings of the
+# upper-cased text, none of them overlapping another
+RISK_SIGNAL_RE = re.compile(r'HIGH RISK|BLOCK|LOW RISK|APPROVE|IRAN|SANCTIONS')
+BLOCK_SIGNALS = frozenset({"HIGH RISK", "BLOCK"})
+APPROVE_SIGNALS = frozenset({"LOW RISK", "APPROVE"})
+SANCTIONS_SIGNALS = frozenset({"IRAN", "SANCTIONS"})
+
+
+@executor
+async def risk_analyzer_executor(
+    customer_response: CustomerDataResponse,
+    ctx: WorkflowContext[RiskAnalysisResponse]
+) -> None:
+    """Risk Analyzer Executor that processes customer data and sends to parallel executors."""
+
+    try:
+        # Configuration
+        model_deployment_name = SETTINGS.model_deployment_name
+
+        if not SETTINGS.risk_analyser_agent_id:
+            raise ValueError("RISK_ANALYSER_AGENT_ID required")
+
+        risk_agent = ChatAgent(
+            chat_client=get_agent_client(SETTINGS.risk_analyser_agent_id, model_deployment_name),
+            model_id=model_deployment_name,
+            store=True
+        )
+
+        # Create risk assessment prompt
+        risk_prompt = RISK_PROMPT_TEMPLATE.format(
+            customer_data=customer_response.customer_data,
+            transaction_id=customer_response.transaction_id,
+        )
 
-                # Send data to both parallel executors (compliance report AND fraud alert)
-                await ctx.send_message(final_result)
+        result = await risk_agent.run(risk_prompt)
+        result_text = result.text if result and hasattr(
+            result, 'text') else "No response from risk agent"
+
+        # Parse structured risk data
+        risk_factors = []
+        recommendation = "INVESTIGATE"  # Default
+        compliance_notes = ""
+
+        signals = set(RISK_SIGNAL_RE.findall(result_text.upper()))
+
+        if signals & BLOCK_SIGNALS:
+            recommendation = "BLOCK"
+            risk_factors.append("High risk transaction identified")
+        elif signals & APPROVE_SIGNALS:
+            recommendation = "APPROVE"
+
+        if signals & SANCTIONS_SIGNALS:
+            compliance_notes = "Sanctions compliance review required"
+
+        final_result = RiskAnalysisResponse.model_construct(
+            customer_data=customer_response.customer_data,
+            risk_analysis=result_text,
+            risk_score="Assessed by Risk Agent based on Cosmos DB data",
+            transaction_id=customer_response.transaction_id,
+            status="SUCCESS",
+            risk_factors=risk_factors,
+            recommendation=recommendation,
+            compliance_notes=compliance_notes
+        )
+
+        # Send data to both parallel executors (compliance report AND fraud alert)
+        await ctx.send_message(final_result)
 
     except Exception as e:
-        error_result = RiskAnalysisResponse(
+        error_result = RiskAnalysisResponse.model_construct(
             customer_data=customer_response.customer_data if customer_response else "No customer data available",
             risk_analysis=f"Error in risk analysis: {str(e)}",
             risk_score="Unknown",
@@ -486,6 +770,28 @@ Provide a structured risk assessment with clear regulatory justification.
         await ctx.send_message(error_result)
 
 
+COMPLIANCE_PROMPT_TEMPLATE = """
+Based on the following Risk Analyser Agent output, please generate a comprehensive audit report:
+
+Risk Analysis Result:
+{risk_analysis}
+
+Transaction ID: {transaction_id}
+Risk Score: {risk_score}
+Recommendation: {recommendation}
+Risk Factors: {risk_factors}
+Compliance Notes: {compliance_notes}
+
+Please provide:
+1. Formal audit report with compliance ratings based on the risk analysis
+2. Specific required actions and recommendations derived from the findings
+3. Executive summary of key audit conclusions
+4. Compliance status and regulatory requirements
+
+Focus on translating the risk analysis into clear audit findings and actionable recommendations for management review.
+"""
+
+
 @executor
 async def compliance_report_executor(
     risk_response: RiskAnalysisResponse,
@@ -495,21 +801,25 @@ async def compliance_report_executor(
 
     try:
         # Configuration
-        project_endpoint = os.environ.get("AI_FOUNDRY_PROJECT_ENDPOINT")
-        model_deployment_name = os.environ.get(
-            "MODEL_DEPLOYMENT_NAME", "gpt-4o-mini")
-        COMPLIANCE_REPORT_AGENT_ID = os.getenv("COMPLIANCE_REPORT_AGENT_ID")
+        model_deployment_name = SETTINGS.model_deployment_name
 
-        # If no specific compliance agent, we can generate the report locally
-        if not COMPLIANCE_REPORT_AGENT_ID:
-            # Generate audit report using local functions
-            audit_report = generate_audit_report_from_risk_analysis(
-                risk_analysis_text=risk_response.risk_analysis,
-                report_type="TRANSACTION_AUDIT"
-            )
+        # Generate audit report using local functions
+        audit_report = generate_audit_report_from_risk_analysis(
+            risk_analysis_text=risk_response.risk_analysis,
+            report_type="TRANSACTION_AUDIT"
+        )
+
+        # LOW RISK transactions need no AI review; the local report is final
+        is_low_risk = (
+            "error" not in audit_report
+            and audit_report["compliance_status"]["compliance_rating"] == "COMPLIANT"
+            and not audit_report["compliance_status"]["requires_immediate_action"]
+        )
 
+        # If no specific compliance agent, we can generate the report locally
+        if not SETTINGS.compliance_report_agent_id or is_low_risk:
             if "error" in audit_report:
-                error_result = ComplianceAuditResponse(
+                error_result = ComplianceAuditResponse.model_construct(
                     audit_report_id="ERROR_REPORT",
                     audit_conclusion=f"Error generating audit report: {audit_report['error']}",
                     compliance_rating="ERROR",
@@ -520,7 +830,7 @@ async def compliance_report_executor(
                 return
 
             # Convert audit report to response model
-            final_result = ComplianceAuditResponse(
+            final_result = ComplianceAuditResponse.model_construct(
                 audit_report_id=audit_report["audit_report_id"],
                 audit_conclusion=audit_report["executive_summary"]["audit_conclusion"],
                 compliance_rating=audit_report["compliance_status"]["compliance_rating"],
@@ -539,81 +849,59 @@ async def compliance_report_executor(
             return
 
         # Use Azure AI agent for compliance reporting
-        async with AzureCliCredential() as credential:
-            compliance_client = AzureAIAgentClient(
-                project_endpoint=project_endpoint,
-                model_deployment_name=model_deployment_name,
-                async_credential=credential,
-                agent_id=COMPLIANCE_REPORT_AGENT_ID
-            )
-
-            async with compliance_client as client:
-                compliance_agent = ChatAgent(
-                    chat_client=client,
-                    model_id=model_deployment_name,
-                    store=True
-                )
-
-                # Create compliance report prompt
-                compliance_prompt = f"""
-Based on the following Risk Analyser Agent output, please generate a comprehensive audit report:
-
-Risk Analysis Result:
-{risk_response.risk_analysis}
-
-Transaction ID: {risk_response.transaction_id}
-Risk Score: {risk_response.risk_score}
-Recommendation: {risk_response.recommendation}
-Risk Factors: {risk_response.risk_factors}
-Compliance Notes: {risk_response.compliance_notes}
-
-Please provide:
-1. Formal audit report with compliance ratings based on the risk analysis
-2. Specific required actions and recommendations derived from the findings
-3. Executive summary of key audit conclusions
-4. Compliance status and regulatory requirements
+        compliance_agent = ChatAgent(
+            chat_client=get_agent_client(SETTINGS.compliance_report_agent_id, model_deployment_name),
+            model_id=model_deployment_name,
+            store=True
+        )
 
-Focus on translating the risk analysis into clear audit findings and actionable recommendations for management review.
-"""
+        # Create compliance report prompt
+        compliance_prompt = COMPLIANCE_PROMPT_TEMPLATE.format(
+            risk_analysis=risk_response.risk_analysis,
+            transaction_id=risk_response.transaction_id,
+            risk_score=risk_response.risk_score,
+            recommendation=risk_response.recommendation,
+            risk_factors=to_json(risk_response.risk_factors),
+            compliance_notes=risk_response.compliance_notes,
+        )
 
-                result = await compliance_agent.run(compliance_prompt)
-                result_text = result.text if result and hasattr(
-                    result, 'text') else "No response from compliance agent"
-
-                # Generate structured audit report locally and combine with AI response
-                local_audit = generate_audit_report_from_risk_analysis(
-                    risk_response.risk_analysis)
-
-                if "error" not in local_audit:
-                    final_result = ComplianceAuditResponse(
-                        audit_report_id=local_audit["audit_report_id"],
-                        audit_conclusion=f"{local_audit['executive_summary']['audit_conclusion']} (AI Enhanced: {result_text[:200]}...)",
-                        compliance_rating=local_audit["compliance_status"]["compliance_rating"],
-                        risk_score=float(local_audit["executive_summary"]["risk_score"]) if isinstance(
-                            local_audit["executive_summary"]["risk_score"], (int, float)) else 0.0,
-                        risk_factors_identified=local_audit["detailed_findings"]["risk_factors_identified"],
-                        compliance_concerns=local_audit["detailed_findings"]["compliance_concerns"],
-                        recommendations=local_audit["detailed_findings"]["recommendations"],
-                        requires_immediate_action=local_audit["compliance_status"]["requires_immediate_action"],
-                        requires_regulatory_filing=local_audit["compliance_status"]["requires_regulatory_filing"],
-                        transaction_id=risk_response.transaction_id,
-                        status="SUCCESS"
-                    )
-                else:
-                    # Fallback if local audit fails
-                    final_result = ComplianceAuditResponse(
-                        audit_report_id=f"AI_AUDIT_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                        audit_conclusion=result_text[:500] if len(
-                            result_text) > 500 else result_text,
-                        compliance_rating="AI_GENERATED",
-                        transaction_id=risk_response.transaction_id,
-                        status="SUCCESS"
-                    )
+        result = await compliance_agent.run(compliance_prompt)
+        result_text = result.text if result and hasattr(
+            result, 'text') else "No response from compliance agent"
+
+        # Combine the structured audit report generated above with the AI response
+        local_audit = audit_report
+
+        if "error" not in local_audit:
+            final_result = ComplianceAuditResponse.model_construct(
+                audit_report_id=local_audit["audit_report_id"],
+                audit_conclusion=f"{local_audit['executive_summary']['audit_conclusion']} (AI Enhanced: {result_text[:200]}...)",
+                compliance_rating=local_audit["compliance_status"]["compliance_rating"],
+                risk_score=float(local_audit["executive_summary"]["risk_score"]) if isinstance(
+                    local_audit["executive_summary"]["risk_score"], (int, float)) else 0.0,
+                risk_factors_identified=local_audit["detailed_findings"]["risk_factors_identified"],
+                compliance_concerns=local_audit["detailed_findings"]["compliance_concerns"],
+                recommendations=local_audit["detailed_findings"]["recommendations"],
+                requires_immediate_action=local_audit["compliance_status"]["requires_immediate_action"],
+                requires_regulatory_filing=local_audit["compliance_status"]["requires_regulatory_filing"],
+                transaction_id=risk_response.transaction_id,
+                status="SUCCESS"
+            )
+        else:
+            # Fallback if local audit fails
+            final_result = ComplianceAuditResponse.model_construct(
+                audit_report_id=f"AI_AUDIT_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                audit_conclusion=result_text[:500] if len(
+                    result_text) > 500 else result_text,
+                compliance_rating="AI_GENERATED",
+                transaction_id=risk_response.transaction_id,
+                status="SUCCESS"
+            )
 
-                await ctx.yield_output(final_result)
+        await ctx.yield_output(final_result)
 
     except Exception as e:
-        error_result = ComplianceAuditResponse(
+        error_result = ComplianceAuditResponse.model_construct(
             audit_report_id="ERROR_REPORT",
             audit_conclusion=f"Error in compliance reporting: {str(e)}",
             compliance_rating="ERROR",
@@ -623,6 +911,87 @@ Focus on translating the risk analysis into clear audit findings and actionable
         await ctx.yield_output(error_result)
 
 
+# Agent run polling interval bounds, in seconds, and the growth factor between polls
+RUN_POLL_INITIAL_DELAY = 0.2
+RUN_POLL_MAX_DELAY = 5.0
+RUN_POLL_BACKOFF = 1.5
+
+# Fraud alert outcome when the agent's reply doesn't say otherwise
+NO_ALERT_ID: Final = "NO_ALERT_CREATED"
+DEFAULT_SEVERITY: Final = "LOW"
+DEFAULT_DECISION_ACTION: Final = "MONITOR"
+DEFAULT_ALERT_TEAM: Final = "fraud_monitoring_team"
+DEFAULT_ALERT_REASONING: Final = "Standard monitoring based on risk assessment"
+
+# Keywords read from the fraud alert agent's reply, matched case-insensitively.
+# Severity and decision keywords are listed in the order they take precedence.
+ALERT_CREATED_KEYWORDS = ("alert created", "createalert", "alert id", "fraud alert")
+SEVERITY_KEYWORDS = ("critical", "high", "medium")
+DECISION_KEYWORDS = ("block", "investigate", "allow")
+# Each keyword's category, the value it sets and its precedence (0 wins)
+FRAUD_ALERT_KEYWORD_TAGS = {
+    **{keyword: ("alert", True, 0) for keyword in ALERT_CREATED_KEYWORDS},
+    **{keyword: ("severity", keyword.upper(), rank) for rank, keyword in enumerate(SEVERITY_KEYWORDS)},
+    **{keyword: ("decision", keyword.upper(), rank) for rank, keyword in enumerate(DECISION_KEYWORDS)},
+}
+# A zero-width lookahead reports overlapping keywords in a single scan; ASCII
+# case folding keeps every match a key of FRAUD_ALERT_KEYWORD_TAGS once lower-cased
+FRAUD_ALERT_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in FRAUD_ALERT_KEYWORD_TAGS) + "))",
+    re.IGNORECASE | re.ASCII)
+
+
+def classify_fraud_alert_response(text: str) -> dict:
+    """Maps each keyword category mentioned in text to its winning value, in one pass.
+
+    The scan stops early once every category holds its top-precedence value,
+    since nothing later can change the classification.
+    """
+    best = {}
+    for match in FRAUD_ALERT_KEYWORD_RE.finditer(text):
+        category, value, rank = FRAUD_ALERT_KEYWORD_TAGS[match.group(1).lower()]
+        current = best.get(category)
+        if current is None or rank < current[0]:
+            best[category] = (rank, value)
+            if len(best) == 3 and not any(top for top, _ in best.values()):
+                break
+    return {category: value for category, (_, value) in best.items()}
+
+
+FRAUD_ALERT_PROMPT_TEMPLATE = """Please analyze this risk assessment and create a fraud alert if needed: 
+Customer data: {customer_data}
+
+RISK ANALYSIS SUMMARY FOR TRANSACTION {transaction_id}
+
+Risk Analysis Result: {risk_analysis}
+Risk Score: {risk_score}
+Recommendation: {recommendation}
+Risk Factors: {risk_factors}
+Compliance Notes: {compliance_notes}
+Status: {status}
+
+Please analyze this risk assessment and create an appropriate fraud alert using the MCP tool if any risk factors or compliance concerns are identified. 
+
+Include all relevant transaction details, risk factors, and provide clear reasoning for the alert decision.
+"""
+
+
+# Fields shared by every failed fraud alert; the except branch fills in the rest
+FRAUD_ALERT_ERROR_TEMPLATE = FraudAlertResponse.model_construct(
+    alert_id="ERROR_ALERT",
+    alert_status="ERROR",
+    severity="UNKNOWN",
+    decision_action="ERROR",
+    alert_created=False,
+    mcp_server_response="",
+    transaction_id="Unknown",
+    status="ERROR",
+    created_timestamp="",
+    assigned_to="error_handling_team",
+    reasoning=""
+)
+
+
 @executor
 async def fraud_alert_executor(
     risk_response: RiskAnalysisResponse,
@@ -633,185 +1002,152 @@ async def fraud_alert_executor(
     try:
 
         # Configuration
-        project_endpoint = os.environ.get("AI_FOUNDRY_PROJECT_ENDPOINT")
-        model_deployment_name = os.environ.get("MODEL_DEPLOYMENT_NAME")
-        mcp_endpoint = os.environ.get("MCP_SERVER_ENDPOINT")
-        mcp_subscription_key = os.environ.get("APIM_SUBSCRIPTION_KEY")
-        FRAUD_ALERT_AGENT_ID = os.getenv("FRAUD_ALERT_AGENT_ID")
-
-        if not FRAUD_ALERT_AGENT_ID:
+        if not SETTINGS.fraud_alert_agent_id:
             raise ValueError("FRAUD_ALERT_AGENT_ID required")
 
-        project_client = AIProjectClient(
-            endpoint=project_endpoint,
-            credential=DefaultAzureCredential(),
-        )
+        mcp_tool = get_fraud_alert_mcp_tool()
+        agents_client = get_project_client().agents
 
-        # Initialize agent MCP tool
-        mcp_tool = McpTool(
-            server_label="fraudalertmcp",
-            server_url=mcp_endpoint,
+        # Fetch the agent and create the thread for communication concurrently
+        agent, thread = await asyncio.gather(
+            get_fraud_alert_agent(agents_client, SETTINGS.fraud_alert_agent_id),
+            agents_client.threads.create(),
         )
-        mcp_tool.update_headers(
-            "Ocp-Apim-Subscription-Key", mcp_subscription_key)
-
-        with project_client:
-            agents_client = project_client.agents
-
-            agent = agents_client.get_agent(FRAUD_ALERT_AGENT_ID)
-            agent.tools.append(mcp_tool)
 
-            # Create thread for communication
-            thread = agents_client.threads.create()
-
-            # Create comprehensive message based on risk analysis
-            risk_summary = f"""
-Customer data: {risk_response.customer_data}
-
-RISK ANALYSIS SUMMARY FOR TRANSACTION {risk_response.transaction_id}
-
-Risk Analysis Result: {risk_response.risk_analysis}
-Risk Score: {risk_response.risk_score}
-Recommendation: {risk_response.recommendation}
-Risk Factors: {risk_response.risk_factors}
-Compliance Notes: {risk_response.compliance_notes}
-Status: {risk_response.status}
+        # Create comprehensive message based on risk analysis
+        alert_prompt = FRAUD_ALERT_PROMPT_TEMPLATE.format(
+            customer_data=risk_response.customer_data,
+            transaction_id=risk_response.transaction_id,
+            risk_analysis=risk_response.risk_analysis,
+            risk_score=risk_response.risk_score,
+            recommendation=risk_response.recommendation,
+            risk_factors=to_json(risk_response.risk_factors),
+            compliance_notes=risk_response.compliance_notes,
+            status=risk_response.status,
+        )
 
-Please analyze this risk assessment and create an appropriate fraud alert using the MCP tool if any risk factors or compliance concerns are identified. 
+        message = await agents_client.messages.create(
+            thread_id=thread.id,
+            role="user",
+            content=alert_prompt,
+        )
 
-Include all relevant transaction details, risk factors, and provide clear reasoning for the alert decision.
-"""
+        # Execute agent run with tool approvals
+        run = await agents_client.runs.create(
+            thread_id=thread.id,
+            agent_id=agent.id,
+            tool_resources=mcp_tool.resources
+        )
 
-            message = agents_client.messages.create(
-                thread_id=thread.id,
-                role="user",
-                content=f"Please analyze this risk assessment and create a fraud alert if needed: {risk_summary}",
-            )
+        # Process run, polling with exponential backoff; approvals are only
+        # requested if the agent itself is configured to require them
+        poll_delay = RUN_POLL_INITIAL_DELAY
+        while run.status in ["queued", "in_progress", "requires_action"]:
+            await asyncio.sleep(poll_delay)
+            previous_status = run.status
+            run = await agents_client.runs.get(
+                thread_id=thread.id, run_id=run.id)
+            # Poll quickly again after progress, back off while the run is idle
+            if run.status != previous_status:
+                poll_delay = RUN_POLL_INITIAL_DELAY
+            else:
+                poll_delay = min(poll_delay * RUN_POLL_BACKOFF, RUN_POLL_MAX_DELAY)
 
-            # Execute agent run with tool approvals
-            run = agents_client.runs.create(
-                thread_id=thread.id,
-                agent_id=agent.id,
-                tool_resources=mcp_tool.resources
-            )
+            if run.status == "requires_action" and isinstance(run.required_action, SubmitToolApprovalAction):
+                tool_calls = run.required_action.submit_tool_approval.tool_calls
+                if not tool_calls:
+                    await agents_client.runs.cancel(
+                        thread_id=thread.id, run_id=run.id)
+                    break
 
-            # Process run with automatic tool approvals
-            while run.status in ["queued", "in_progress", "requires_action"]:
-                time.sleep(1)
-                run = agents_client.runs.get(
-                    thread_id=thread.id, run_id=run.id)
-
-                if run.status == "requires_action" and isinstance(run.required_action, SubmitToolApprovalAction):
-                    tool_calls = run.required_action.submit_tool_approval.tool_calls
-                    if not tool_calls:
-                        agents_client.runs.cancel(
-                            thread_id=thread.id, run_id=run.id)
-                        break
-
-                    tool_approvals = []
-                    for tool_call in tool_calls:
-                        if isinstance(tool_call, RequiredMcpToolCall):
-                            try:
-                                tool_approvals.append(
-                                    ToolApproval(
-                                        tool_call_id=tool_call.id,
-                                        approve=True,
-                                        headers=mcp_tool.headers,
-                                    )
+                headers = mcp_tool.headers
+                tool_approvals = []
+                for tool_call in tool_calls:
+                    if isinstance(tool_call, RequiredMcpToolCall):
+                        try:
+                            tool_approvals.append(
+                                ToolApproval(
+                                    tool_call_id=tool_call.id,
+                                    approve=True,
+                                    headers=headers,
                                 )
-                            except Exception as e:
-                                print(
-                                    f"Error approving tool_call {tool_call.id}: {e}")
-
-                    if tool_approvals:
-                        agents_client.runs.submit_tool_outputs(
-                            thread_id=thread.id, run_id=run.id, tool_approvals=tool_approvals
-                        )
-
-            # Collect agent response
-            messages = agents_client.messages.list(
-                thread_id=thread.id, order=ListSortOrder.ASCENDING)
-
-            agent_response = ""
-            for msg in messages:
-                if msg.role == "assistant" and msg.text_messages:
-                    agent_response = msg.text_messages[-1].text.value
-                    break
+                            )
+                        except Exception:
+                            logger.exception(
+                                "Error approving tool_call %s", tool_call.id)
+
+                if tool_approvals:
+                    await agents_client.runs.submit_tool_outputs(
+                        thread_id=thread.id, run_id=run.id, tool_approvals=tool_approvals
+                    )
 
-            # Parse agent response to extract alert information
-            alert_created = False
-            alert_id = "NO_ALERT_CREATED"
-            severity = "LOW"
-            decision_action = "MONITOR"
-            assigned_to = "fraud_monitoring_team"
-            reasoning = "Standard monitoring based on risk assessment"
-
-            if agent_response:
-                # Check if alert was created
-                if any(keyword in agent_response.lower() for keyword in ['alert created', 'createalert', 'alert id', 'fraud alert']):
-                    alert_created = True
-                    alert_id = f"ALERT_{risk_response.transaction_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-
-                # Extract severity if mentioned
-                if "HIGH" in agent_response.upper():
-                    severity = "HIGH"
-                elif "CRITICAL" in agent_response.upper():
-                    severity = "CRITICAL"
-                elif "MEDIUM" in agent_response.upper():
-                    severity = "MEDIUM"
-
-                # Extract decision action if mentioned
-                if "BLOCK" in agent_response.upper():
-                    decision_action = "BLOCK"
-                elif "INVESTIGATE" in agent_response.upper():
-                    decision_action = "INVESTIGATE"
-                elif "ALLOW" in agent_response.upper():
-                    decision_action = "ALLOW"
-
-                reasoning = agent_response[:200] + \
-                    "..." if len(agent_response) > 200 else agent_response
-
-            final_result = FraudAlertResponse(
-                alert_id=alert_id,
-                alert_status="OPEN" if alert_created else "NO_ACTION_REQUIRED",
-                severity=severity,
-                decision_action=decision_action,
-                alert_created=alert_created,
-                mcp_server_response=agent_response,
-                transaction_id=risk_response.transaction_id,
-                status="SUCCESS",
-                created_timestamp=datetime.now().isoformat(),
-                assigned_to=assigned_to,
-                reasoning=reasoning
-            )
+        # Collect the agent's latest reply; newest first, one message per page,
+        # so normally only the final message is fetched
+        messages = agents_client.messages.list(
+            thread_id=thread.id, order=ListSortOrder.DESCENDING, limit=1)
+
+        agent_response = ""
+        async for msg in messages:
+            if msg.role == "assistant" and msg.text_messages:
+                agent_response = msg.text_messages[-1].text.value
+                break
+
+        # Parse agent response to extract alert information
+        now = datetime.now()
+        alert_created = False
+        alert_id = NO_ALERT_ID
+        severity = DEFAULT_SEVERITY
+        decision_action = DEFAULT_DECISION_ACTION
+        assigned_to = DEFAULT_ALERT_TEAM
+        reasoning = DEFAULT_ALERT_REASONING
+
+        if agent_response:
+            classification = classify_fraud_alert_response(agent_response)
+
+            # Check if alert was created
+            if classification.get("alert"):
+                alert_created = True
+                alert_id = f"ALERT_{risk_response.transaction_id}_{now:%Y%m%d_%H%M%S}"
+
+            # Extract severity and decision action if mentioned
+            severity = classification.get("severity", severity)
+            decision_action = classification.get("decision", decision_action)
+
+            reasoning = truncate(agent_response, 200)
+
+        final_result = FraudAlertResponse.model_construct(
+            alert_id=alert_id,
+            alert_status="OPEN" if alert_created else "NO_ACTION_REQUIRED",
+            severity=severity,
+            decision_action=decision_action,
+            alert_created=alert_created,
+            mcp_server_response=agent_response,
+            transaction_id=risk_response.transaction_id,
+            status="SUCCESS",
+            created_timestamp=now.isoformat(),
+            assigned_to=assigned_to,
+            reasoning=reasoning
+        )
 
-            # Clean up agent (optional - comment out to reuse)
-            # agents_client.delete_agent(agent.id)
+        # Clean up agent (optional - comment out to reuse)
+        # agents_client.delete_agent(agent.id)
 
-            await ctx.yield_output(final_result)
+        await ctx.yield_output(final_result)
 
     except Exception as e:
-        error_result = FraudAlertResponse(
-            alert_id="ERROR_ALERT",
-            alert_status="ERROR",
-            severity="UNKNOWN",
-            decision_action="ERROR",
-            alert_created=False,
-            mcp_server_response=f"Error in fraud alert processing: {str(e)}",
-            transaction_id=risk_response.transaction_id if risk_response else "Unknown",
-            status="ERROR",
-            created_timestamp=datetime.now().isoformat(),
-            assigned_to="error_handling_team",
-            reasoning=f"Error occurred during fraud alert processing: {str(e)}"
-        )
+        error_message = f"Error in fraud alert processing: {e}"
+        error_result = FRAUD_ALERT_ERROR_TEMPLATE.model_copy(update={
+            "mcp_server_response": error_message,
+            "transaction_id": risk_response.transaction_id if risk_response else "Unknown",
+            "created_timestamp": datetime.now().isoformat(),
+            "reasoning": error_message,
+        })
         await ctx.yield_output(error_result)
 
 
-async def run_fraud_detection_workflow():
-    """Execute the fraud detection workflow using Microsoft Agent Framework with parallel execution."""
-
-    # Build workflow with four executors - parallel execution for compliance and fraud alert
-    workflow = (
+def build_fraud_detection_workflow():
+    """Build the four-executor workflow - parallel execution for compliance and fraud alert"""
+    return (
         WorkflowBuilder()
         .set_start_executor(customer_data_executor)
         .add_edge(customer_data_executor, risk_analyzer_executor)
@@ -822,27 +1158,105 @@ async def run_fraud_detection_workflow():
         .build()
     )
 
-    # Create request
-    request = AnalysisRequest(
-        message="Comprehensive fraud analysis using Microsoft Agent Framework with parallel execution",
-        transaction_id="TX2002"  # Test avec une autre transaction
-    )
+
+# The topology is fixed, so the graph is built and validated once at import.
+# A workflow instance is not reentrant: it runs one request at a time, so
+# callers check it out and get a freshly built graph while it is busy.
+FRAUD_DETECTION_WORKFLOW = build_fraud_detection_workflow()
+_shared_workflow_busy = False
+
+
+def checkout_workflow():
+    """The shared workflow if it is idle, otherwise a newly built one"""
+    global _shared_workflow_busy
+    if _shared_workflow_busy:
+        return build_fraud_detection_workflow()
+    _shared_workflow_busy = True
+    return FRAUD_DETECTION_WORKFLOW
+
+
+def release_workflow(workflow) -> None:
+    """Return a workflow taken with checkout_workflow()"""
+    global _shared_workflow_busy
+    if workflow is FRAUD_DETECTION_WORKFLOW:
+        _shared_workflow_busy = False
+
+# Position of each parallel executor's output in the workflow result tuple
+WORKFLOW_OUTPUT_SLOTS = {
+    ComplianceAuditResponse: 0,
+    FraudAlertResponse: 1,
+}
+
+
+DEFAULT_REQUEST = AnalysisRequest(
+    message="Comprehensive fraud analysis using Microsoft Agent Framework with parallel execution",
+    transaction_id="TX2002"  # Test avec une autre transaction
+)
+
+
+async def run_fraud_detection_workflow(request: AnalysisRequest = DEFAULT_REQUEST, workflow=None):
+    """Execute the fraud detection workflow using Microsoft Agent Framework with parallel execution.
+
+    A given workflow must not be running another request; without one, the
+    shared workflow is used when idle and a new graph is built otherwise.
+    """
+    if workflow is None:
+        workflow = checkout_workflow()
+        try:
+            return await run_fraud_detection_workflow(request, workflow)
+        finally:
+            release_workflow(workflow)
 
     # Execute workflow with streaming
-    compliance_output = None
-    fraud_alert_output = None
+    outputs = [None, None]
 
     print("🔄 Executing 4-Executor Fraud Detection Workflow with Parallel Processing...")
 
     async for event in workflow.run_stream(request):
         # Capture outputs from both parallel executors
         if isinstance(event, WorkflowOutputEvent):
-            if isinstance(event.data, ComplianceAuditResponse):
-                compliance_output = event.data
-            elif isinstance(event.data, FraudAlertResponse):
-                fraud_alert_output = event.data
+            slot = WORKFLOW_OUTPUT_SLOTS.get(type(event.data))
+            if slot is not None:
+                outputs[slot] = event.data
+
+    return tuple(outputs)
+
+
+async def run_batch(requests, max_concurrency: int = 32) -> list:
+    """Run the workflow for many transactions concurrently, returning results in request order.
+
+    A workflow instance runs one request at a time, so each concurrent slot
+    checks out its own instance from a small pool; the pool size caps the
+    number of transactions in flight. The shared workflow is the first member
+    when it is idle, and only the remaining slots build new graphs.
 
-    return compliance_output, fraud_alert_output
+    If any run fails, the others are cancelled and awaited before the pool is
+    released, and the failures are raised as an ExceptionGroup. The
+    process-wide clients stay open; close_clients() is left to the caller.
+    """
+    if max_concurrency < 1:
+        raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+
+    requests = list(requests)
+    workflows = asyncio.Queue()
+    pool = [checkout_workflow() for _ in range(min(max_concurrency, len(requests)))]
+    for workflow in pool:
+        workflows.put_nowait(workflow)
+
+    async def run_one(request: AnalysisRequest):
+        workflow = await workflows.get()
+        try:
+            return await run_fraud_detection_workflow(request, workflow)
+        finally:
+            workflows.put_nowait(workflow)
+
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(run_one(request)) for request in requests]
+    finally:
+        for workflow in pool:
+            release_workflow(workflow)
+    return [task.result() for task in tasks]
 
 
 async def main():
@@ -850,48 +1264,54 @@ async def main():
     try:
         compliance_result, fraud_alert_result = await run_fraud_detection_workflow()
 
-        print(f"\n🎯 4-EXECUTOR PARALLEL WORKFLOW RESULTS")
-        print(f"=" * 60)
+        # Assemble the whole report and write it in one call
+        lines = [
+            "\n🎯 4-EXECUTOR PARALLEL WORKFLOW RESULTS",
+            "=" * 60,
+        ]
 
-        # Display Compliance Report results
+        # Compliance Report results
         if compliance_result and isinstance(compliance_result, ComplianceAuditResponse):
-            print(f"\n📋 COMPLIANCE REPORT EXECUTOR:")
-            print(f"   Status: {compliance_result.status}")
-            print(f"   Transaction ID: {compliance_result.transaction_id}")
-            print(f"   Audit Report ID: {compliance_result.audit_report_id}")
-            print(
-                f"   Compliance Rating: {compliance_result.compliance_rating}")
-            print(f"   Risk Score: {compliance_result.risk_score:.2f}")
-            print(
-                f"   Conclusion: {compliance_result.audit_conclusion[:100]}...")
-
+            lines += [
+                "\n📋 COMPLIANCE REPORT EXECUTOR:",
+                f"   Status: {compliance_result.status}",
+                f"   Transaction ID: {compliance_result.transaction_id}",
+                f"   Audit Report ID: {compliance_result.audit_report_id}",
+                f"   Compliance Rating: {compliance_result.compliance_rating}",
+                f"   Risk Score: {compliance_result.risk_score:.2f}",
+                f"   Conclusion: {truncate(compliance_result.audit_conclusion, 100)}",
+            ]
             if compliance_result.requires_immediate_action:
-                print("   ⚠️  IMMEDIATE ACTION REQUIRED")
+                lines.append("   ⚠️  IMMEDIATE ACTION REQUIRED")
             if compliance_result.requires_regulatory_filing:
-                print("   📋 REGULATORY FILING REQUIRED")
+                lines.append("   📋 REGULATORY FILING REQUIRED")
         else:
-            print(f"\n📋 COMPLIANCE REPORT EXECUTOR: ❌ FAILED")
+            lines.append("\n📋 COMPLIANCE REPORT EXECUTOR: ❌ FAILED")
 
-        # Display Fraud Alert results
+        # Fraud Alert results
         if fraud_alert_result and isinstance(fraud_alert_result, FraudAlertResponse):
-            print(f"\n🚨 FRAUD ALERT EXECUTOR:")
-            print(f"   Status: {fraud_alert_result.status}")
-            print(f"   Transaction ID: {fraud_alert_result.transaction_id}")
-            print(f"   Alert ID: {fraud_alert_result.alert_id}")
-            print(
-                f"   Alert Created: {'✅ YES' if fraud_alert_result.alert_created else '❌ NO'}")
-            print(f"   Severity: {fraud_alert_result.severity}")
-            print(f"   Decision Action: {fraud_alert_result.decision_action}")
-            print(f"   Alert Status: {fraud_alert_result.alert_status}")
-            print(f"   Assigned To: {fraud_alert_result.assigned_to}")
-            print(f"   Reasoning: {fraud_alert_result.reasoning[:100]}...")
+            lines += [
+                "\n🚨 FRAUD ALERT EXECUTOR:",
+                f"   Status: {fraud_alert_result.status}",
+                f"   Transaction ID: {fraud_alert_result.transaction_id}",
+                f"   Alert ID: {fraud_alert_result.alert_id}",
+                f"   Alert Created: {'✅ YES' if fraud_alert_result.alert_created else '❌ NO'}",
+                f"   Severity: {fraud_alert_result.severity}",
+                f"   Decision Action: {fraud_alert_result.decision_action}",
+                f"   Alert Status: {fraud_alert_result.alert_status}",
+                f"   Assigned To: {fraud_alert_result.assigned_to}",
+                f"   Reasoning: {truncate(fraud_alert_result.reasoning, 100)}",
+            ]
             if fraud_alert_result.created_timestamp:
-                print(f"   Created At: {fraud_alert_result.created_timestamp}")
+                lines.append(f"   Created At: {fraud_alert_result.created_timestamp}")
         else:
-            print(f"\n🚨 FRAUD ALERT EXECUTOR: ❌ FAILED")
+            lines.append("\n🚨 FRAUD ALERT EXECUTOR: ❌ FAILED")
 
-        print(f"\n✅ 4-EXECUTOR PARALLEL WORKFLOW COMPLETED")
-        print(f"   Architecture: Customer Data → Risk Analyzer → (Compliance Report + Fraud Alert)")
+        lines += [
+            "\n✅ 4-EXECUTOR PARALLEL WORKFLOW COMPLETED",
+            "   Architecture: Customer Data → Risk Analyzer → (Compliance Report + Fraud Alert)",
+        ]
+        print("\n".join(lines))
 
         return compliance_result, fraud_alert_result
 
@@ -899,5 +1319,8 @@ async def main():
         print(f"❌ Workflow execution failed: {str(e)}")
         return None, None
 
+    finally:
+        await close_clients()
+
 if __name__ == "__main__":
     compliance, fraud_alert = asyncio.run(main())
@@ -0,0 +1,121 @@
+import copy
+import random
+
+import pytest
+
+pytest.importorskip("agent_framework")
+
+from sequential_workflow_chal2 import (
+    ALERT_CREATED_KEYWORDS,
+    RISK_PHRASES,
+    classify_fraud_alert_response,
+    find_risk_phrases,
+    generate_audit_report_from_risk_analysis,
+    parse_risk_analysis_result,
+)
+
+
+@pytest.mark.parametrize("text", [
+    "Transfer to a Syrian account",
+    "Beneficiary is a North Korean entity",
+    "Payment routed via a Yemeni bank",
+    "Counterparties are Iranians",
+    "Funds sent to Russians abroad",
+])
+def test_high_risk_country_demonyms_score_as_high_risk(text):
+    result = parse_risk_analysis_result(text)
+    assert result["parsed_elements"]["risk_score"] == 80.0
+
+
+def reference_risk_phrases(text):
+    """The per-phrase substring scan find_risk_phrases replaced"""
+    lowered = text.lower()
+    return {phrase for phrase in RISK_PHRASES if phrase in lowered}
+
+
+RISK_PHRASE_FRAGMENTS = [
+    "no ", "not ", "high", "-risk", " risk", " country", "sanction", "s", " check clear",
+    " flag", " match", " concern", "large", " amount", "suspicious", "frequent",
+    "unusual ", "normal ", "frequency", "block", "medium", "below", "under", "in",
+    "low", "triggering", "HIGH RISK", "Sanctions", " ", "x",
+]
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "no sanctions flag",
+    "sanctions check clear",
+    "not high-risk country",
+    "no high-risk country and not suspicious",
+    "HIGH-RISK COUNTRY, SANCTIONS MATCH, BLOCK",
+    "unusual frequency, not frequent, normal frequency",
+])
+def test_find_risk_phrases_matches_substring_scan(text):
+    assert find_risk_phrases(text) == reference_risk_phrases(text)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_find_risk_phrases_matches_substring_scan_on_random_text(seed):
+    rng = random.Random(seed)
+    for _ in range(1000):
+        text = "".join(rng.choice(RISK_PHRASE_FRAGMENTS) for _ in range(rng.randint(0, 12)))
+        assert find_risk_phrases(text) == reference_risk_phrases(text), text
+
+
+def reference_fraud_alert_classification(text):
+    """The cascade of substring checks classify_fraud_alert_response replaced"""
+    lowered, upper = text.lower(), text.upper()
+    alert = any(keyword in lowered for keyword in ALERT_CREATED_KEYWORDS)
+    severity = next((level for level in ("CRITICAL", "HIGH", "MEDIUM") if level in upper), "LOW")
+    action = next((action for action in ("BLOCK", "INVESTIGATE", "ALLOW") if action in upper), "MONITOR")
+    return alert, severity, action
+
+
+def fraud_alert_classification(text):
+    classification = classify_fraud_alert_response(text)
+    return (
+        bool(classification.get("alert")),
+        classification.get("severity", "LOW"),
+        classification.get("decision", "MONITOR"),
+    )
+
+
+FRAUD_ALERT_FRAGMENTS = [
+    "alert", " created", "create", "Alert ", "id", "fraud ", "HIGH", "critical",
+    "Medium", "block", "investigate", "allow", "al", "low", " ", "x",
+]
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "fraud alert id FA-1: severity HIGH, then CRITICAL; BLOCK",
+    "criticallow",
+    "Severity: medium. Decision: allow, later investigate",
+    "createalert called; HIGH; CRITICAL; ALLOW; BLOCK; trailing high",
+])
+def test_classify_fraud_alert_response_matches_keyword_cascade(text):
+    assert fraud_alert_classification(text) == reference_fraud_alert_classification(text)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_classify_fraud_alert_response_matches_keyword_cascade_on_random_text(seed):
+    rng = random.Random(seed)
+    for _ in range(1000):
+        text = "".join(rng.choice(FRAUD_ALERT_FRAGMENTS) for _ in range(rng.randint(0, 14)))
+        assert fraud_alert_classification(text) == reference_fraud_alert_classification(text), text
+
+
+def test_audit_report_mutation_does_not_leak_into_cache():
+    text = "Transaction TX1001 to Iran. Risk Score: 85. Sanctions concern, large amount, BLOCK."
+    first = generate_audit_report_from_risk_analysis(text)
+    expected = copy.deepcopy(first)
+
+    for findings in first["detailed_findings"].values():
+        findings.append("tampered")
+    first["detailed_findings"]["extra"] = ["tampered"]
+    first["executive_summary"]["audit_conclusion"] = "tampered"
+    first["compliance_status"]["compliance_rating"] = "tampered"
+
+    second = generate_audit_report_from_risk_analysis(text)
+    for section in ("executive_summary", "detailed_findings", "compliance_status"):
+        assert second[section] == expected[section]